@@ -0,0 +1,94 @@
+# Numba kernels for parsing large coordinate columns. Kept out of network.py so
+# numba is only imported once an input is big enough to use them.
+import numba
+import numpy as np
+
+@numba.njit(cache=True)
+def _is_space(c):
+    """Whitespace or the NUL padding of fixed-width byte strings"""
+    return c == 32 or c == 0 or 9 <= c <= 13
+
+@numba.njit(cache=True)
+def _float_token(buf, start, end):
+    """Return the stripped bounds of buf[start:end] if it is a decimal float, else (0, 0)"""
+    while start < end and _is_space(buf[start]):
+        start += 1
+    while end > start and _is_space(buf[end - 1]):
+        end -= 1
+    
+    # Same grammar as _FLOAT_RE in network.py: [+-]digits[.digits][e[+-]digits]
+    i = start
+    if i < end and (buf[i] == 45 or buf[i] == 43):  # '-' or '+'
+        i += 1
+    digits = 0
+    while i < end and 48 <= buf[i] <= 57:
+        digits += 1
+        i += 1
+    if i < end and buf[i] == 46:  # '.'
+        i += 1
+        while i < end and 48 <= buf[i] <= 57:
+            digits += 1
+            i += 1
+    if digits == 0:
+        return 0, 0
+    
+    if i < end and (buf[i] == 101 or buf[i] == 69):  # 'e' or 'E'
+        i += 1
+        if i < end and (buf[i] == 45 or buf[i] == 43):
+            i += 1
+        exp_digits = 0
+        while i < end and 48 <= buf[i] <= 57:
+            exp_digits += 1
+            i += 1
+        if exp_digits == 0:
+            return 0, 0
+    if i != end:
+        return 0, 0
+    
+    return start, end
+
+@numba.njit(cache=True)
+def _copy_token(buf, start, end, out):
+    """Copy buf[start:end] into the zero-filled row out, or b'nan' for an empty token"""
+    if start == end:
+        out[0] = 110  # 'n'
+        out[1] = 97   # 'a'
+        out[2] = 110  # 'n'
+        return
+    for j in range(end - start):
+        out[j] = buf[start + j]
+
+@numba.njit(cache=True, parallel=True)
+def split_coords(flat, offsets, out_lat, out_lon):
+    """Copy the latitude and longitude tokens of each "lat, lon" byte string
+    delimited by offsets into the rows of out_lat/out_lon.
+    
+    Invalid or missing fields become b'nan'. The caller converts the rows with
+    numpy's bytes-to-float64 cast, which rounds exactly like float().
+    """
+    for i in numba.prange(len(offsets) - 1):
+        start = offsets[i]
+        end = offsets[i + 1]
+        
+        # Find the comma separating latitude and longitude
+        comma = -1
+        for j in range(start, end):
+            if flat[j] == 44:
+                comma = j
+                break
+        if comma < 0:
+            lat_start, lat_end = _float_token(flat, start, end)
+            _copy_token(flat, lat_start, lat_end, out_lat[i])
+            _copy_token(flat, 0, 0, out_lon[i])
+            continue
+        
+        # Like str.split(','), the longitude ends at the next comma
+        stop = end
+        for j in range(comma + 1, end):
+            if flat[j] == 44:
+                stop = j
+                break
+        lat_start, lat_end = _float_token(flat, start, comma)
+        lon_start, lon_end = _float_token(flat, comma + 1, stop)
+        _copy_token(flat, lat_start, lat_end, out_lat[i])
+        _copy_token(flat, lon_start, lon_end, out_lon[i])
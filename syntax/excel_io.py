@@ -0,0 +1,118 @@
+import pandas as pd
+import importlib.util
+import os
+
+# pandas' default na_values (pandas._libs.parsers.STR_NA_VALUES), copied so that
+# importing this module does not depend on a private pandas module
+NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+def _parquet_path(path):
+    """Path of the parquet cache kept next to an Excel workbook"""
+    return os.path.splitext(path)[0] + '.parquet'
+
+def has_fresh_cache(path):
+    """Whether the workbook has a parquet cache at least as new as itself"""
+    parquet_path = _parquet_path(path)
+    return os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+
+def _can_write_parquet():
+    """Whether a parquet engine is installed to write the cache with"""
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+def load_excel(path, usecols=None, dtype=None):
+    """Load an Excel sheet, caching it as a parquet file next to the workbook
+    
+    A fresh cache is read column-wise, so only usecols are loaded. On a cold or
+    stale cache the whole sheet is parsed once (usecols is not applied to
+    read_excel) so that callers needing different columns can share the cache.
+    Without a parquet engine nothing is cached and only usecols are read.
+    """
+    parquet_path = _parquet_path(path)
+    if has_fresh_cache(path):
+        df = pd.read_parquet(parquet_path, columns=usecols)
+    elif not _can_write_parquet():
+        df = pd.read_excel(path, usecols=usecols)
+    else:
+        df = pd.read_excel(path)
+        try:
+            df.to_parquet(parquet_path)
+        except (ValueError, TypeError, OSError) as e:
+            print(f"Could not write parquet cache {parquet_path}: {e}")
+        if usecols is not None:
+            df = df[usecols]
+    if dtype is not None:
+        df = df.astype(dtype)
+    return df
+
+def _cell_value(cell, type_error, type_numeric):
+    """Convert an openpyxl cell like pd.read_excel: '' when empty, NaN for errors, int when whole"""
+    if cell.value is None:
+        return ''
+    if cell.data_type == type_error:
+        return float('nan')
+    if cell.data_type == type_numeric:
+        as_int = int(cell.value)
+        return as_int if as_int == cell.value else float(cell.value)
+    return cell.value
+
+def iter_xlsx(path, sheet=0):
+    """Stream (row, column index) pairs from an Excel sheet without building a DataFrame
+    
+    Cells are converted like pd.read_excel does, and rows after the last
+    non-empty one (e.g. cells that only carry formatting) are dropped.
+    """
+    import openpyxl
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+    
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[sheet].iter_rows()
+        cols = [cell.value for cell in next(rows, ())]
+        idx = {c: i for i, c in enumerate(cols)}
+        # Hold back empty rows until a non-empty one follows, so trailing ones are never yielded
+        pending = []
+        for cells in rows:
+            row = tuple(_cell_value(cell, TYPE_ERROR, TYPE_NUMERIC) for cell in cells)
+            if all(value == '' for value in row):
+                pending.append(row)
+                continue
+            for empty in pending:
+                yield empty, idx
+            pending.clear()
+            yield row, idx
+    finally:
+        wb.close()
+
+def iter_excel_chunks(path, usecols, dtype=None, chunksize=10_000):
+    """Yield the usecols of an Excel sheet as DataFrames of up to chunksize rows
+    
+    A fresh parquet cache is read as a single chunk. Otherwise the sheet is
+    streamed with openpyxl, so memory stays bounded by chunksize; text cells in
+    NA_VALUES become NaN, so the concatenated chunks match
+    pd.read_excel(path, usecols=usecols). Streaming does not write the cache,
+    as that would need the whole sheet in memory.
+    """
+    if has_fresh_cache(path):
+        yield load_excel(path, usecols=usecols, dtype=dtype)
+        return
+    
+    def to_frame(records):
+        df = pd.DataFrame(records, columns=usecols)
+        if dtype is not None:
+            df = df.astype(dtype)
+        return df
+    
+    records = []
+    for row, idx in iter_xlsx(path):
+        records.append([
+            float('nan') if isinstance(value, str) and value in NA_VALUES else value
+            for value in (row[idx[col]] if idx[col] < len(row) else '' for col in usecols)
+        ])
+        if len(records) == chunksize:
+            yield to_frame(records)
+            records = []
+    if records:
+        yield to_frame(records)
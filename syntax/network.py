@@ -1,79 +1,118 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Charts are only saved to disk, no GUI backend needed
 import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
+import os
+from excel_io import iter_excel_chunks, load_excel
 
-def extract_coordinates(coord_str):
-    """Extract latitude and longitude from coordinate string"""
-    if isinstance(coord_str, str) and coord_str != 'N/A' and ',' in coord_str:
+plt.rcParams['figure.max_open_warning'] = 0
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+# Below this many rows the Numba compile/dispatch overhead outweighs the gain
+NUMBA_MIN_ROWS = 10_000
+
+# Plain decimal floats; coords_numba._float_token accepts the same grammar
+_FLOAT_RE = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+
+def _load_split_coords():
+    """Import the Numba split_coords kernel on first use, or return None without Numba"""
+    try:
+        from coords_numba import split_coords
+    except ImportError:
+        return None
+    return split_coords
+
+def _tokens_to_float(tokens):
+    """Convert a Series of number strings to float64, NaN where not a valid float"""
+    tokens = tokens.str.strip()
+    valid = tokens.str.fullmatch(_FLOAT_RE).fillna(False).astype(bool)
+    out = np.full(len(tokens), np.nan)
+    # numpy's str -> float64 cast rounds exactly like float(); pd.to_numeric does not
+    out[valid.to_numpy()] = tokens[valid].to_numpy(dtype=str).astype(np.float64)
+    return pd.Series(out, index=tokens.index)
+
+def _extract_coordinates_numba(series, split_coords):
+    """Extract latitude and longitude Series using the Numba split_coords kernel"""
+    values = series.where(series.notna(), '').astype(str).to_numpy()
+    encoded = values.astype('S')
+    flat = np.frombuffer(encoded.tobytes(), dtype=np.uint8)
+    offsets = np.arange(len(encoded) + 1, dtype=np.int64) * encoded.itemsize
+    
+    # One zero-padded row per value, wide enough for the b'nan' placeholder
+    width = max(encoded.itemsize, 3)
+    out_lat = np.zeros((len(encoded), width), dtype=np.uint8)
+    out_lon = np.zeros((len(encoded), width), dtype=np.uint8)
+    split_coords(flat, offsets, out_lat, out_lon)
+    
+    lat = out_lat.view(f'S{width}').ravel().astype(np.float64)
+    lon = out_lon.view(f'S{width}').ravel().astype(np.float64)
+    return pd.Series(lat, index=series.index), pd.Series(lon, index=series.index)
+
+def extract_coordinates_vec(series):
+    """Extract latitude and longitude Series from a column of coordinate strings"""
+    split_coords = _load_split_coords() if len(series) > NUMBA_MIN_ROWS else None
+    if split_coords is not None:
         try:
-            parts = coord_str.split(',')
-            if len(parts) >= 2:
-                lat = float(parts[0].strip())
-                lon = float(parts[1].strip())
-                return lat, lon
-        except (ValueError, TypeError):
+            return _extract_coordinates_numba(series, split_coords)
+        except UnicodeEncodeError:
+            # Non-ASCII cells cannot be parsed byte-wise; use the pandas path
             pass
-    return None, None
+    
+    s = series.where(series.notna() & (series != 'N/A')).astype('string')
+    parts = s.str.split(',', expand=True).reindex(columns=[0, 1]).astype('string')
+    return _tokens_to_float(parts[0]), _tokens_to_float(parts[1])
+
+def build_sticker_points(sticker_df):
+    """Map each unique sticker location to its (lat, lon) coordinates"""
+    locs = sticker_df.drop_duplicates(subset=['sticker_location'])
+    lat_arr, lon_arr = extract_coordinates_vec(locs['sticker_location_coordinates'])
+    valid = locs['sticker_location'].notna() & lat_arr.notna() & lon_arr.notna()
+    return dict(zip(locs.loc[valid, 'sticker_location'],
+                    zip(lat_arr[valid].tolist(), lon_arr[valid].tolist())))
 
-def create_simple_map(sticker_location_file, general_file):
+def create_simple_map(sticker_df, general_df=None):
     """Create a map showing only the sticker locations (Points A-I)"""
-    # Load data from Excel files
-    sticker_df = pd.read_excel(sticker_location_file)
-    
     # Extract unique sticker locations
-    unique_points = {}
-    for _, row in sticker_df.drop_duplicates(subset=['sticker_location']).iterrows():
-        location = row['sticker_location']
-        coordinates = row['sticker_location_coordinates']
-        if pd.notna(location) and pd.notna(coordinates):
-            lat, lon = extract_coordinates(coordinates)
-            if lat is not None and lon is not None:
-                unique_points[location] = (lat, lon)
-    
-    # Create a graph
-    G = nx.Graph()
-    
-    # Add nodes (points) to the graph
-    for point, (lat, lon) in unique_points.items():
-        G.add_node(point, pos=(lon, lat))
+    unique_points = build_sticker_points(sticker_df)
     
-    # Add edges between points (optional, creates a simple connected path)
-    points = list(unique_points.keys())
-    for i in range(len(points)-1):
-        G.add_edge(points[i], points[i+1])
-    
-    # Get positions for plotting
-    pos = nx.get_node_attributes(G, 'pos')
+    # Stack the points in order; consecutive points form a simple connected path
+    names = list(unique_points)
+    coords = np.array([unique_points[name] for name in names]).reshape(-1, 2)
+    lats, lons = coords[:, 0], coords[:, 1]
     
     # Plot the network
     plt.figure(figsize=(12, 10))
+    ax = plt.gca()
+    ax.tick_params(axis='both', which='both', bottom=False, left=False,
+                   labelbottom=False, labelleft=False)
     
     try:
         # Try using contextily for map background
         import contextily as ctx
         
-        # Create axis
-        ax = plt.gca()
+        # Keep downloaded tiles on disk so later runs skip the download
+        tile_cache_dir = os.path.expanduser('~/.cache/contextily')
+        os.makedirs(tile_cache_dir, exist_ok=True)
+        ctx.set_cache_dir(tile_cache_dir)
         
         # Draw edges
-        nx.draw_networkx_edges(G, pos, edge_color='blue', width=2, alpha=0.7, ax=ax)
+        ax.plot(lons, lats, color='blue', linewidth=2, alpha=0.7)
         
         # Draw nodes
-        nx.draw_networkx_nodes(G, pos, node_size=300, node_color='red', alpha=0.8, ax=ax)
+        ax.scatter(lons, lats, s=300, c='red', alpha=0.8, zorder=3)
         
         # Draw labels - only for sticker locations
-        labels = {point: point for point in G.nodes()}
-        nx.draw_networkx_labels(G, pos, labels=labels, font_size=12, font_weight='bold',
-                              bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=2), ax=ax)
+        for name, x, y in zip(names, lons, lats):
+            ax.annotate(name, (x, y), ha='center', va='center', fontsize=12, fontweight='bold',
+                        bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=2), zorder=4)
         
         # Set limits to include all points with some padding
-        lons = [x[0] for x in pos.values()]
-        lats = [x[1] for x in pos.values()]
+        (min_lat, min_lon), (max_lat, max_lon) = coords.min(0), coords.max(0)
         lon_margin = 0.003  # About 300 meters at this latitude
         lat_margin = 0.003
-        plt.xlim(min(lons) - lon_margin, max(lons) + lon_margin)
-        plt.ylim(min(lats) - lat_margin, max(lats) + lat_margin)
+        plt.xlim(min_lon - lon_margin, max_lon + lon_margin)
+        plt.ylim(min_lat - lat_margin, max_lat + lat_margin)
         
         # Add title
         plt.title("Sticker Locations (Points A-I)", fontsize=15, pad=20)
@@ -90,13 +129,14 @@ def create_simple_map(sticker_location_file, general_file):
     except ImportError:
         print("Contextily package not installed. Creating basic plot...")
         # Draw edges
-        nx.draw_networkx_edges(G, pos, edge_color='gray', alpha=0.6)
+        ax.plot(lons, lats, color='gray', alpha=0.6)
         
         # Draw nodes
-        nx.draw_networkx_nodes(G, pos, node_size=200, node_color='red', alpha=0.8)
+        ax.scatter(lons, lats, s=200, c='red', alpha=0.8, zorder=3)
         
         # Draw labels
-        nx.draw_networkx_labels(G, pos, font_size=12, font_weight='bold')
+        for name, x, y in zip(names, lons, lats):
+            ax.annotate(name, (x, y), ha='center', va='center', fontsize=12, fontweight='bold', zorder=4)
         
         # Add title
         plt.title("Sticker Locations (Points A-I)", fontsize=15)
@@ -114,106 +154,112 @@ def create_simple_map(sticker_location_file, general_file):
         
     return unique_points
 
-def create_expanded_map(sticker_location_file, general_file):
-    """Create a map showing both sticker locations and organization locations"""
+def create_expanded_map(sticker_df, general_chunks):
+    """Create a map showing both sticker locations and organization locations
+    
+    general_chunks is an iterable of DataFrame chunks of the general workbook,
+    e.g. from excel_io.iter_excel_chunks; only one chunk is held at a time.
+    """
     try:
         import folium
         from folium.plugins import MarkerCluster
         
-        # Load data
-        sticker_df = pd.read_excel(sticker_location_file)
-        general_df = pd.read_excel(general_file)
-        
         # Create unique points dictionaries
-        sticker_points = {}
-        for _, row in sticker_df.drop_duplicates(subset=['sticker_location']).iterrows():
-            location = row['sticker_location']
-            coordinates = row['sticker_location_coordinates']
-            if pd.notna(location) and pd.notna(coordinates):
-                lat, lon = extract_coordinates(coordinates)
-                if lat is not None and lon is not None:
-                    sticker_points[location] = (lat, lon)
+        sticker_points = build_sticker_points(sticker_df)
         
         # Extract valid organization locations
         org_points = {}
-        for _, row in general_df.iterrows():
-            coords = row['organization_location_coordinates']
-            if pd.notna(coords) and coords != 'N/A':
-                lat, lon = extract_coordinates(coords)
-                if lat is not None and lon is not None:
-                    sticker_id = row['sticker_id']
-                    org_name = str(row['organization']) if pd.notna(row['organization']) else "Unknown"
-                    org_key = f"{org_name}_{sticker_id}"
-                    org_points[org_key] = {
-                        'coords': (lat, lon),
-                        'org_name': org_name,
-                        'sticker_id': sticker_id,
-                        'topic': str(row['topic']) if pd.notna(row['topic']) else "Unknown"
-                    }
+        for general_df in general_chunks:
+            lat_arr, lon_arr = extract_coordinates_vec(general_df['organization_location_coordinates'])
+            valid = lat_arr.notna() & lon_arr.notna()
+            orgs = general_df.loc[valid, ['sticker_id', 'organization', 'topic']]
+            orgs[['organization', 'topic']] = orgs[['organization', 'topic']].fillna('Unknown').astype(str)
+            for sticker_id, org_name, topic, lat, lon in zip(orgs['sticker_id'], orgs['organization'], orgs['topic'],
+                                                             lat_arr[valid].tolist(), lon_arr[valid].tolist()):
+                org_key = f"{org_name}_{sticker_id}"
+                org_points[org_key] = {
+                    'coords': (lat, lon),
+                    'org_name': org_name,
+                    'sticker_id': sticker_id,
+                    'topic': topic
+                }
         
         # Find connections between stickers and organizations
-        connections = []
-        for _, sticker_row in sticker_df.iterrows():
-            sticker_id = sticker_row['sticker_ID']
-            sticker_loc = sticker_row['sticker_location']
-            
-            # Find matching organization
-            for org_key, org_data in org_points.items():
-                if org_data['sticker_id'] == sticker_id:
-                    if sticker_loc in sticker_points:
-                        connections.append({
-                            'sticker_loc': sticker_loc,
-                            'sticker_coords': sticker_points[sticker_loc],
-                            'org_key': org_key,
-                            'org_coords': org_data['coords'],
-                            'org_name': org_data['org_name'],
-                            'topic': org_data['topic']
-                        })
+        org_df = pd.DataFrame(
+            [(org_key, data['sticker_id'], *data['coords'], data['org_name'], data['topic'])
+             for org_key, data in org_points.items()],
+            columns=['org_key', 'sticker_id', 'org_lat', 'org_lon', 'org_name', 'topic']
+        )
+        sticker_coords_df = pd.DataFrame(
+            [(loc, lat, lon) for loc, (lat, lon) in sticker_points.items()],
+            columns=['sticker_location', 'sticker_lat', 'sticker_lon']
+        )
+        connections = (
+            sticker_df.rename(columns={'sticker_ID': 'sticker_id'})[['sticker_id', 'sticker_location']]
+            .merge(org_df, on='sticker_id', how='inner')
+            .merge(sticker_coords_df, on='sticker_location', how='inner')
+        )
         
         # Calculate map center
-        all_lats = [lat for lat, _ in sticker_points.values()]
-        all_lats.extend([data['coords'][0] for data in org_points.values()])
-        
-        all_lons = [lon for _, lon in sticker_points.values()]
-        all_lons.extend([data['coords'][1] for data in org_points.values()])
-        
-        center_lat = sum(all_lats) / len(all_lats)
-        center_lon = sum(all_lons) / len(all_lons)
+        sp = np.array(list(sticker_points.values())).reshape(-1, 2)
+        op = org_df[['org_lat', 'org_lon']].to_numpy()
+        center_lat, center_lon = np.vstack([sp, op]).mean(axis=0)
         
         # Create map
         m = folium.Map(location=[center_lat, center_lon], zoom_start=14, tiles='OpenStreetMap')
         
-        # Add sticker location markers (red)
-        for loc, (lat, lon) in sticker_points.items():
+        # Build markers up front and attach each layer to the map once
+        sticker_markers = [
             folium.Marker(
                 [lat, lon],
                 popup=f"<b>{loc}</b>",
                 tooltip=loc,
                 icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(m)
+            )
+            for loc, (lat, lon) in sticker_points.items()
+        ]
         
-        # Add organization markers (green)
-        for org_key, data in org_points.items():
-            lat, lon = data['coords']
+        org_popups = ("<b>Organization:</b> " + org_df['org_name'] +
+                      "<br><b>Topic:</b> " + org_df['topic']).tolist()
+        org_markers = [
             folium.Marker(
                 [lat, lon],
-                popup=f"<b>Organization:</b> {data['org_name']}<br><b>Topic:</b> {data['topic']}",
-                tooltip=data['org_name'],
+                popup=popup,
+                tooltip=org_name,
                 icon=folium.Icon(color='green', icon='home')
-            ).add_to(m)
+            )
+            for lat, lon, org_name, popup in zip(org_df['org_lat'], org_df['org_lon'],
+                                                 org_df['org_name'], org_popups)
+        ]
         
-        # Add connections
-        for conn in connections:
-            sticker_lat, sticker_lon = conn['sticker_coords']
-            org_lat, org_lon = conn['org_coords']
-            
+        connection_lines = [
             folium.PolyLine(
-                [(sticker_lat, sticker_lon), (org_lat, org_lon)],
+                [(conn.sticker_lat, conn.sticker_lon), (conn.org_lat, conn.org_lon)],
                 color='blue',
                 weight=2,
                 opacity=0.5,
                 dash_array='5'
-            ).add_to(m)
+            )
+            for conn in connections.itertuples(index=False)
+        ]
+        
+        # Add sticker location markers (red)
+        sticker_cluster = MarkerCluster(name='Stickers')
+        for marker in sticker_markers:
+            sticker_cluster.add_child(marker)
+        sticker_cluster.add_to(m)
+        
+        # Add organization markers (green)
+        org_cluster = MarkerCluster(name='Organizations')
+        for marker in org_markers:
+            org_cluster.add_child(marker)
+        org_cluster.add_to(m)
+        
+        # Add connections
+        connection_group = folium.FeatureGroup(name='Connections')
+        for line in connection_lines:
+            connection_group.add_child(line)
+        connection_group.add_to(m)
         
         # Save map
         m.save('expanded_network_map.html')
@@ -229,14 +275,27 @@ if __name__ == "__main__":
     sticker_location_file = '/Users/sophiehamann/Documents/Angewandte_bewerbung_cds/analysis/sticker_location.xlsx'
     general_file = '/Users/sophiehamann/Documents/Angewandte_bewerbung_cds/analysis/general.xlsx'
     
+    # Load the sticker data (or its parquet cache) once and share it between both maps
+    sticker_df = load_excel(
+        sticker_location_file,
+        usecols=['sticker_ID', 'sticker_location', 'sticker_location_coordinates'],
+        dtype={'sticker_ID': 'int32'}
+    )
+    
     # Create simple map with just the sticker locations (Points A-I)
     print("Creating map of sticker locations...")
-    sticker_points = create_simple_map(sticker_location_file, general_file)
+    sticker_points = create_simple_map(sticker_df)
     print(f"Created map with {len(sticker_points)} sticker locations")
     
     # Create expanded interactive map with sticker locations and organizations
     print("\nCreating expanded interactive map...")
-    success = create_expanded_map(sticker_location_file, general_file)
+    # Stream the general workbook in chunks (or read its fresh parquet cache)
+    general_chunks = iter_excel_chunks(
+        general_file,
+        usecols=['sticker_id', 'organization', 'topic', 'organization_location_coordinates'],
+        dtype={'sticker_id': 'int32'}
+    )
+    success = create_expanded_map(sticker_df, general_chunks)
     
     if success:
         print("\nVisualization complete!")
@@ -0,0 +1,47 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Font
+
+from excel_io import NA_VALUES, iter_excel_chunks
+
+def _write_workbook(path):
+    """A general.xlsx-like sheet with NA tokens, error cells, a blank row and formatted trailing rows"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(['sticker_id', 'organization', 'topic', 'organization_location_coordinates'])
+    ws.append([1, 'Org A', 'climate', '48.2082, 16.3738'])
+    ws.append([2, '#REF!', 'housing', '48.21, 16.37'])
+    ws.append([3.0, 'Org C', '#DIV/0!', 'N/A'])
+    ws.append([3.5, 'Org D', '  ', None])
+    ws.append([])
+    for i, token in enumerate(sorted(NA_VALUES - {''})):
+        ws.append([10 + i, token, token, token])
+    ws.append([None, None, 'last', None])
+    for row in range(ws.max_row + 1, ws.max_row + 4):
+        for col in range(1, 5):
+            ws.cell(row, col).font = Font(bold=True)
+    wb.save(path)
+
+def test_iter_excel_chunks_matches_read_excel(tmp_path):
+    path = tmp_path / 'general.xlsx'
+    _write_workbook(path)
+    usecols = ['sticker_id', 'organization', 'topic', 'organization_location_coordinates']
+
+    expected = pd.read_excel(path, usecols=usecols)
+    streamed = pd.concat(iter_excel_chunks(str(path), usecols=usecols, chunksize=4), ignore_index=True)
+
+    assert len(streamed) == len(expected)
+    for col in usecols:
+        assert streamed[col].isna().tolist() == expected[col].isna().tolist(), col
+        mask = expected[col].notna().to_numpy()
+        assert streamed[col][mask].tolist() == expected[col][mask].tolist(), col
+    assert np.isnan(streamed.loc[1, 'organization'])
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_iter_excel_chunks_matches_read_excel(Path(tmp))
+    print("iter_excel_chunks matches pd.read_excel")
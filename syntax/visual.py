@@ -1,69 +1,77 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Charts are only saved to disk, no GUI backend needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
-from collections import Counter
+from excel_io import load_excel
+
+plt.rcParams['figure.max_open_warning'] = 0
+plt.rcParams['path.simplify_threshold'] = 1.0
+
+# Shared figure reused by the chart functions instead of creating a new one each time
+_FIG = plt.figure(figsize=(12, 10))
+_VIRIDIS = plt.colormaps['viridis']
+
+def _new_axes(figsize):
+    """Clear the shared figure, resize it and return a fresh axes"""
+    _FIG.clear()
+    _FIG.set_size_inches(figsize)
+    return _FIG.add_subplot(111)
+
+def _viridis_colors(n):
+    """Sample n colors from viridis (same spacing as sns.color_palette)"""
+    return _VIRIDIS(np.linspace(0, 1, n + 2)[1:-1])
 
 def analyze_topic_frequencies(file_path):
     """Analyze and visualize topic frequencies from the data"""
     # Read the Excel file
-    df = pd.read_excel(file_path)
+    df = load_excel(file_path, usecols=['topic'])
     
     # Clean the topic data
     df['topic'] = df['topic'].astype(str).str.strip()
     
     # Remove N/A and empty values
-    df = df[df['topic'].notna() & (df['topic'] != 'N/A') & (df['topic'] != 'nan')]
-    
-    # Count topic frequencies
-    topic_counts = Counter(df['topic'])
+    mask = df['topic'].notna() & ~df['topic'].isin(['N/A', 'nan', ''])
+    df = df.loc[mask]
     
-    # Convert to DataFrame for easier plotting
-    topic_df = pd.DataFrame({
-        'Topic': list(topic_counts.keys()),
-        'Count': list(topic_counts.values())
-    })
-    
-    # Sort by count (descending)
-    topic_df = topic_df.sort_values('Count', ascending=False).reset_index(drop=True)
+    # Count topic frequencies, sorted by count (descending)
+    counts = df['topic'].value_counts(sort=True)
+    topic_df = counts.rename_axis('Topic').reset_index(name='Count')
     
     return topic_df
 
 def create_bar_chart(topic_df, output_file):
     """Create a horizontal bar chart of topic frequencies"""
-    plt.figure(figsize=(12, 10))
+    ax = _new_axes((12, 10))
     
     # Set a nice color palette
-    colors = sns.color_palette("viridis", len(topic_df))
+    colors = _viridis_colors(len(topic_df))
     
     # Create horizontal bar chart
-    bars = plt.barh(topic_df['Topic'], topic_df['Count'], color=colors)
+    bars = ax.barh(topic_df['Topic'], topic_df['Count'], color=colors)
     
     # Add count labels to the end of each bar
-    for bar in bars:
-        width = bar.get_width()
-        plt.text(width + 0.3, bar.get_y() + bar.get_height()/2, 
-                 f'{width:.0f}', ha='left', va='center', fontweight='bold')
+    ax.bar_label(bars, fmt='%.0f', padding=3, fontweight='bold')
     
     # Add labels and title
-    plt.xlabel('Number of Mentions', fontsize=12)
-    plt.ylabel('Topic', fontsize=12)
-    plt.title('Frequency of Topics Mentioned', fontsize=16)
+    ax.set_xlabel('Number of Mentions', fontsize=12)
+    ax.set_ylabel('Topic', fontsize=12)
+    ax.set_title('Frequency of Topics Mentioned', fontsize=16)
     
     # Remove top and right spines
-    plt.gca().spines['top'].set_visible(False)
-    plt.gca().spines['right'].set_visible(False)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
     
     # Add gridlines
-    plt.grid(axis='x', linestyle='--', alpha=0.7)
+    ax.grid(axis='x', linestyle='--', alpha=0.7)
     
     # Tight layout
-    plt.tight_layout()
+    _FIG.tight_layout()
     
     # Save the chart
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    plt.close()
+    _FIG.savefig(output_file, dpi=300, bbox_inches='tight')
     
     print(f"Bar chart saved as {output_file}")
 
@@ -72,33 +80,26 @@ def create_pie_chart(topic_df, output_file):
     # For pie chart, let's group less frequent topics as "Other"
     threshold = 3  # Topics with less than this count will be grouped
     
-    # Copy the dataframe to avoid modifying the original
-    pie_df = topic_df.copy()
+    # Split topics into those shown individually and those grouped as "Other"
+    mask = topic_df['Count'] < threshold
+    labels = topic_df.loc[~mask, 'Topic'].tolist()
+    counts = topic_df.loc[~mask, 'Count'].tolist()
+    other_count = int(topic_df.loc[mask, 'Count'].sum())
     
-    # Identify topics to group
-    to_group = pie_df[pie_df['Count'] < threshold]
-    
-    if not to_group.empty:
-        # Create a new row for "Other" category
-        other_count = to_group['Count'].sum()
-        
-        # Remove the rows to be grouped
-        pie_df = pie_df[pie_df['Count'] >= threshold]
-        
-        # Add the "Other" row
-        other_row = pd.DataFrame({'Topic': ['Other'], 'Count': [other_count]})
-        pie_df = pd.concat([pie_df, other_row], ignore_index=True)
+    if other_count:
+        labels.append('Other')
+        counts.append(other_count)
     
     # Create the pie chart
-    plt.figure(figsize=(12, 10))
+    ax = _new_axes((12, 10))
     
     # Use a nice colormap
-    colors = sns.color_palette("viridis", len(pie_df))
+    colors = _viridis_colors(len(counts))
     
     # Plot
-    wedges, texts, autotexts = plt.pie(
-        pie_df['Count'], 
-        labels=pie_df['Topic'], 
+    wedges, texts, autotexts = ax.pie(
+        counts, 
+        labels=labels, 
         autopct='%1.1f%%',
         startangle=90,
         colors=colors,
@@ -112,16 +113,15 @@ def create_pie_chart(topic_df, output_file):
         autotext.set_color('white')
     
     # Equal aspect ratio ensures the pie chart is circular
-    plt.axis('equal')
+    ax.axis('equal')
     
-    plt.title('Distribution of Topics', fontsize=16)
+    ax.set_title('Distribution of Topics', fontsize=16)
     
     # Tight layout
-    plt.tight_layout()
+    _FIG.tight_layout()
     
     # Save the chart
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
-    plt.close()
+    _FIG.savefig(output_file, dpi=300, bbox_inches='tight')
     
     print(f"Pie chart saved as {output_file}")
 
@@ -131,7 +131,7 @@ def create_wordcloud(topic_df, output_file):
         from wordcloud import WordCloud
         
         # Create a dictionary with topic as key and frequency as value
-        topic_dict = dict(zip(topic_df['Topic'], topic_df['Count']))
+        topic_dict = dict(zip(topic_df['Topic'].to_numpy(), topic_df['Count'].to_numpy().astype(int)))
         
         # Generate the word cloud
         wordcloud = WordCloud(
@@ -142,18 +142,19 @@ def create_wordcloud(topic_df, output_file):
             max_words=100,
             min_font_size=10,
             max_font_size=100,
+            prefer_horizontal=1.0,
+            relative_scaling=0,
             random_state=42
         ).generate_from_frequencies(topic_dict)
         
         # Plot
-        plt.figure(figsize=(10, 8))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.tight_layout(pad=0)
+        ax = _new_axes((10, 8))
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis('off')
+        _FIG.tight_layout(pad=0)
         
         # Save the word cloud
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        plt.close()
+        _FIG.savefig(output_file, dpi=300, bbox_inches='tight')
         
         print(f"Word cloud saved as {output_file}")
         
@@ -163,7 +164,7 @@ def create_wordcloud(topic_df, output_file):
 def analyze_organization_topics(file_path, output_file):
     """Analyze which organizations focus on which topics"""
     # Read the Excel file
-    df = pd.read_excel(file_path)
+    df = load_excel(file_path, usecols=['organization', 'topic'])
     
     # Clean and filter data
     df = df[(df['organization'].notna()) & (df['organization'] != 'N/A') & 
@@ -173,21 +174,15 @@ def analyze_organization_topics(file_path, output_file):
     df['organization'] = df['organization'].astype(str).str.strip()
     df['topic'] = df['topic'].astype(str).str.strip()
     
-    # Count organization-topic pairs
-    org_topic_counts = df.groupby(['organization', 'topic']).size().reset_index(name='count')
-    
-    # Get top 10 organizations by sticker count
-    top_orgs = df['organization'].value_counts().nlargest(10).index.tolist()
-    
-    # Filter for top organizations
-    filtered_counts = org_topic_counts[org_topic_counts['organization'].isin(top_orgs)]
+    # Get top 10 organizations by sticker count. This runs on the string column
+    # so ties keep first-appearance order (a categorical breaks them alphabetically)
+    top_orgs = df['organization'].value_counts().nlargest(10).index
+    df_top = df[df['organization'].isin(top_orgs)]
     
-    # Create a pivot table
-    pivot_table = filtered_counts.pivot_table(
-        index='organization', 
-        columns='topic', 
-        values='count',
-        fill_value=0
+    # Count organization-topic pairs in a single crosstab over categorical codes
+    pivot_table = pd.crosstab(
+        df_top['organization'].astype('category'),
+        df_top['topic'].astype('category')
     )
     
     # Plot heatmap